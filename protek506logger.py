@@ -11,6 +11,10 @@ Key features:
   -p, --port     : Manual serial port override (e.g., COM3, /dev/ttyUSB0)
   -f, --file     : Output CSV filename (default: Protek-506-log.txt)
   -d, --delay    : Polling interval in seconds (default: 0.2)
+  -q, --quiet    : Suppress the live console view of readings
+  --flush-every  : Flush the CSV file every N rows (default: 0 = block buffering)
+  --strict-regex : Parse readings with the regex instead of the byte-scan parser
+  --fsync        : Also fsync to disk on each flush (with --flush-every)
   -v, --version  : Show program's version number and exit
 - Robust parsing tuned to real output (preserves leading zeros, handles OL/OPEN/SHORT,
   logic level High/Low/----, overload variants)
@@ -32,9 +36,7 @@ import serial
 import serial.tools.list_ports
 import signal
 import datetime
-import time
 import sys
-import csv
 import re
 import argparse
 import os
@@ -47,6 +49,18 @@ DATE_FORMAT = "%Y-%m-%d"                   # CSV 'date' column
 TIME_FORMAT = "%H:%M:%S.%f"                 # CSV 'time' column and console (ms)
 # =======================================================================
 
+# Specialized formatters for the default formats above: strftime re-parses
+# the format string on every call, which is wasted work at 5 Hz for a fixed
+# pattern. Used only when the formats have not been customized.
+def _fast_date(now):
+    return f"{now.year:04d}-{now.month:02d}-{now.day:02d}"
+
+def _fast_time(now):
+    return (f"{now.hour:02d}:{now.minute:02d}:{now.second:02d}"
+            f".{now.microsecond // 1000:03d}")
+
+USE_FAST_TIMESTAMPS = (DATE_FORMAT == "%Y-%m-%d" and TIME_FORMAT == "%H:%M:%S.%f")
+
 # Short mode names matching observed output
 MODE_MAP = {
     'A': 'AC',
@@ -60,6 +74,67 @@ MODE_MAP = {
     'T': 'TEMP',
 }
 
+# 256-entry lookup over the raw first byte of a frame, so non-mode frames
+# can be dropped without decoding them first. Entry 0 means "not a mode";
+# any other value indexes into MODE_NAMES.
+MODE_TABLE = bytearray(256)
+MODE_NAMES = ('UNKNOWN',) + tuple(MODE_MAP.values())
+for _i, _key in enumerate(MODE_MAP):
+    MODE_TABLE[ord(_key)] = _i + 1
+
+# Literal (non-numeric) readings the meter can emit, longest-first so
+# prefix probing never shadows a longer token
+_LITERAL_TOKENS = ('SHORT', 'OPEN', 'HIGH', '-OL', '.OL', '----', 'LOW', 'OL')
+
+def _normalize_units(buf):
+    """Strip leading whitespace and fix the meter's mangled degree symbol.
+
+    The payload is already right-stripped, so one lstrip suffices; the
+    '^C' membership check short-circuits the replace on the common path.
+    """
+    buf = buf.lstrip()
+    if '^C' in buf:
+        buf = buf.replace('^C', '°C')
+    return buf
+
+def _parse_reading(rest):
+    """Split a stripped payload into (reading, units) without the regex VM.
+
+    Accepts the same grammar as the regex fallback: an optional sign,
+    digits with an optional decimal point, an optional k/m/u/z multiplier,
+    or one of the literal tokens above (case-insensitive). The units side
+    comes back normalized; the reading is '' when none is present.
+    """
+    head = rest[:5].upper()
+    for token in _LITERAL_TOKENS:
+        if head.startswith(token):
+            end = len(token)
+            return rest[:end], _normalize_units(rest[end:])
+
+    n = len(rest)
+    i = 1 if rest[:1] in ('-', '+') else 0
+    first_digit = i
+    while i < n and '0' <= rest[i] <= '9':
+        i += 1
+    if i < n and rest[i] == '.' and i + 1 < n and '0' <= rest[i + 1] <= '9':
+        i += 2
+        while i < n and '0' <= rest[i] <= '9':
+            i += 1
+    if i == first_digit:
+        return '', _normalize_units(rest)  # no digits: not a numeric reading
+    if i < n and rest[i] in 'kmuzKMUZ':
+        i += 1
+    return rest[:i], _normalize_units(rest[i:])
+
+def _csv_field(field):
+    """Escape a field for CSV output; meter output never actually needs
+    quoting, so this is a defensive check that is nearly always a no-op."""
+    if '"' in field:
+        return '"' + field.replace('"', '""') + '"'
+    if ',' in field or '\n' in field or '\r' in field:
+        return '"' + field + '"'
+    return field
+
 # Command-line arguments with short options
 parser = argparse.ArgumentParser(
     description="Protek 506 serial logger"
@@ -81,6 +156,28 @@ parser.add_argument(
     default=0.2,
     help="Polling delay in seconds (default: 0.2)"
 )
+parser.add_argument(
+    '--flush-every',
+    type=int,
+    default=0,
+    metavar='N',
+    help="Flush the CSV file every N rows (default: 0 = rely on block buffering)"
+)
+parser.add_argument(
+    '-q', '--quiet',
+    action='store_true',
+    help="Suppress the live console view of readings"
+)
+parser.add_argument(
+    '--strict-regex',
+    action='store_true',
+    help="Parse readings with the regex instead of the byte-scan parser"
+)
+parser.add_argument(
+    '--fsync',
+    action='store_true',
+    help="Also fsync to disk on each --flush-every flush (requires --flush-every > 0)"
+)
 parser.add_argument(
     '-v', '--version',
     action='store_true',
@@ -97,6 +194,12 @@ if args.version:
 if args.delay <= 0:
     parser.error("--delay must be a positive number greater than 0")
 
+if args.flush_every < 0:
+    parser.error("--flush-every must be 0 or a positive number of rows")
+
+if args.fsync and args.flush_every <= 0:
+    parser.error("--fsync requires --flush-every to be greater than 0")
+
 if args.file:
     dir_path = os.path.dirname(os.path.abspath(args.file))
     if not os.path.exists(dir_path):
@@ -154,106 +257,178 @@ if args.port:
 else:
     port = find_protek_port()
 
-# Open serial connection
+# Set delay from args
+delay = args.delay
+
+# Open serial connection. The read timeout doubles as the pacing
+# primitive: read_until blocks until a frame arrives or the poll
+# interval elapses, so the main loop needs no explicit sleep.
 ser = serial.Serial(
     port=port,
     baudrate=1200,
     bytesize=7,
     stopbits=2,
     parity='N',
-    timeout=1.0,
+    timeout=delay,
     exclusive=True
 )
 
-# Set delay from args
-delay = args.delay
+# Ctrl+C handler: only record the request here. The main loop checks the
+# flag between reads and the finally block does the real cleanup; closing
+# the port or touching the log file from inside a signal handler could
+# deadlock on a write interrupted mid-row.
+stop_requested = False
 
-# Ctrl+C handler
 def signal_handler(sig, frame):
-    print("\nCtrl+C pressed - closing port and exiting...")
-    if ser.is_open:
-        ser.close()
-    sys.exit(0)
+    global stop_requested
+    stop_requested = True
 
 signal.signal(signal.SIGINT, signal_handler)
 
 # Function to read data from serial (improved from old snippet)
-def read_data_from_serial(ser):
-    ser.write(b'\n')  # Send trigger once, outside the loop
+def read_data_from_serial(ser, trigger):
+    if trigger:
+        ser.write(b'\n')  # The meter re-streams after a single trigger
     line = ser.read_until(b'\r')  # Efficient read until terminator
     if not line or line[-1] != ord('\r'):
         return None  # Timeout or incomplete
-    data = line[:-1].decode('ascii', errors='ignore').strip()
-    return data
+    # Return raw bytes; decoding is deferred until a frame passes the
+    # mode filter, so dropped frames cost no str allocation
+    return line[:-1].strip()
 
 print("\nPort open. Ensure RS-232 mode is enabled on the meter.")
 print(f"Logging to: {args.file}")
 print("Started — press Ctrl+C to stop.\n")
 
-# Open log file with header logic
-with open(args.file, 'a', newline='', encoding='utf-8') as csvfile:
-    writer = csv.writer(csvfile)
-    
+# Open log file unbuffered: rows are formatted straight to bytes and
+# batched in our own bytearray, so the os.write below is the only layer
+# between a row and the kernel
+with open(args.file, 'ab', buffering=0) as csvfile:
+    fd = csvfile.fileno()
+
     # Only write header if file is empty
     csvfile.seek(0, 2)
     if csvfile.tell() == 0:
-        writer.writerow(['date', 'time', 'mode', 'reading', 'units'])
+        csvfile.write(b'date,time,mode,reading,units\n')
     
-    first_byte_chars = set(MODE_MAP.keys())
+    flush_every = args.flush_every
+    strict_regex = args.strict_regex
+    row_count = 0
+
+    # Live view only when someone is watching: a redirected stdout turns
+    # each print into pipe writes that just slow the loop down
+    live_view = not args.quiet and sys.stdout.isatty()
+
+    # Accumulate encoded rows here and hand them to the kernel in chunked
+    # os.write calls; --flush-every 1 degenerates to the old row-at-a-time
+    # behaviour for users who prioritize durability
+    pending = bytearray()
+    WRITE_CHUNK = 4096
+
+    # Steady-state readings repeat the exact same frame for many polls in a
+    # row; remember the last raw frame and its parse so identical frames
+    # skip decode and regex entirely
+    last_raw = None
+    last_parsed = None
     
-    # Updated regex: includes logic levels (High/Low/----) per manual
+    # Anchored reading pattern, matched against an upper-cased copy of the
+    # payload so re.IGNORECASE (which disables several re fast paths) is not
+    # needed. The numeric alternative comes first because numeric readings
+    # dominate; literal tokens (incl. logic levels High/Low/---- per manual)
+    # are only tried for the rare non-numeric frames.
     reading_pattern = re.compile(
-        r'([\-+]?[0-9]*\.?[0-9]+[kmuz]?|\.OL|-OL|OL|OPEN|SHORT|High|Low|----)',
-        re.IGNORECASE
+        r'([\-+]?[0-9]*\.?[0-9]+[KMUZ]?|\.OL|-OL|OL|OPEN|SHORT|HIGH|LOW|----)'
     )
     
+    # Trigger only when the previous read timed out; while the meter is
+    # streaming, frame arrival paces the loop
+    need_trigger = True
+
     try:
-        while True:
-            data = read_data_from_serial(ser)
+        while not stop_requested:
+            data = read_data_from_serial(ser, need_trigger)
+            if stop_requested:
+                break
             if data is None:
-                time.sleep(delay)
+                # Timed out: read_until already blocked for the poll
+                # interval, so re-arm the trigger and retry immediately
+                need_trigger = True
                 continue
-            
-            if not data or data[0] not in first_byte_chars:
-                time.sleep(delay)
+            need_trigger = False
+
+            if not data:
                 continue
-            
+
+            mode_idx = MODE_TABLE[data[0]]
+            if mode_idx == 0:
+                continue
+
+            # Timestamp only frames that passed the filter above
             now = datetime.datetime.now()
-            
-            date_str = now.strftime(DATE_FORMAT)
-            time_str = now.strftime(TIME_FORMAT)[:-3]  # ms precision
-            
-            # Live view on console
-            console_line = f"{time_str} {data}"
-            print(console_line)
-            
-            mode_code = data[0]
-            mode = MODE_MAP.get(mode_code, 'UNKNOWN')
-            
-            rest = data[1:].strip()
-            
-            match = reading_pattern.search(rest)
-            if match:
-                reading = match.group(1)
-                units_start = match.end()
-                units = rest[units_start:].strip()
+
+            if USE_FAST_TIMESTAMPS:
+                date_str = _fast_date(now)
+                time_str = _fast_time(now)  # already ms precision
             else:
-                reading = ''
-                units = rest.strip()
+                date_str = now.strftime(DATE_FORMAT)
+                time_str = now.strftime(TIME_FORMAT)[:-3]  # ms precision
             
-            # Fix mangled degree symbol if present
-            if '^C' in units:
-                units = units.replace('^C', '°C')
-            
-            # Write structured row
-            writer.writerow([date_str, time_str, mode, reading, units])
-            csvfile.flush()
-            
-            time.sleep(delay)
+            if data == last_raw:
+                # Unchanged frame: reuse the previous parse
+                text, mode, reading, units = last_parsed
+            else:
+                # Frame is being kept: decode it once, for console and parsing
+                text = data.decode('ascii', errors='ignore')
+
+                mode = MODE_NAMES[mode_idx]
+
+                rest = text[1:].strip()
+
+                if strict_regex:
+                    # Match against the upper-cased payload, then slice the
+                    # original so reading/units keep the meter's casing
+                    # (upper() is length-preserving for this ASCII data)
+                    match = reading_pattern.match(rest.upper())
+                    if match:
+                        units_start = match.end()
+                        reading = rest[:units_start]
+                        units = _normalize_units(rest[units_start:])
+                    else:
+                        reading = ''
+                        units = _normalize_units(rest)
+                else:
+                    reading, units = _parse_reading(rest)
+
+                last_raw = data
+                last_parsed = (text, mode, reading, units)
+
+            # Live view on console, reusing time_str as-is
+            if live_view:
+                print(f"{time_str} {text}")
             
+            # Queue the structured row; writing is opt-in (--flush-every) or
+            # chunked, so the default path makes one write() per ~4 KiB of
+            # rows. Only reading/units can ever need CSV quoting.
+            pending += (f"{date_str},{time_str},{mode},"
+                        f"{_csv_field(reading)},{_csv_field(units)}\n"
+                        ).encode('utf-8')
+            row_count += 1
+            flush_now = flush_every > 0 and row_count % flush_every == 0
+            if flush_now or len(pending) >= WRITE_CHUNK:
+                os.write(fd, pending)
+                pending.clear()
+                if flush_now and args.fsync:
+                    os.fsync(fd)
+
+        if stop_requested:
+            print("\nCtrl+C pressed - closing port and exiting...")
+
     except Exception as e:
         print(f"\nError: {e}")
     finally:
-        # Explicit cleanup
+        # Explicit cleanup: drain any queued rows before the file closes
+        if pending:
+            os.write(fd, pending)
+            pending.clear()
         if ser.is_open:
             ser.close()
\ No newline at end of file